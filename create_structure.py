@@ -5,20 +5,34 @@ com design patterns e clean code
 """
 import os
 from pathlib import Path
+from typing import Union
 
-def create_file(path: str, content: str):
-    """Cria um arquivo com o conteúdo especificado"""
-    file_path = Path(path)
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
-    print(f"✓ Criado: {path}")
+# Fila de arquivos pendentes (caminho, conteúdo já codificado)
+_PENDING: list[tuple[Path, bytes]] = []
+
+def create_file(path: str, content: Union[str, bytes]):
+    """Enfileira um arquivo com o conteúdo especificado (gravado em _flush)"""
+    # Conteúdo já em bytes é gravado como está, sem recodificar
+    data = content if isinstance(content, bytes) else content.encode('utf-8')
+    _PENDING.append((Path(path), data))
+
+def _flush():
+    """Grava todos os arquivos enfileirados de uma só vez"""
+    # Cria cada diretório pai uma única vez, do mais raso ao mais profundo
+    for directory in sorted({p.parent for p, _ in _PENDING}, key=lambda d: len(d.parts)):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    # write_bytes grava o buffer inteiro de uma vez (conteúdo já codificado)
+    for file_path, data in _PENDING:
+        file_path.write_bytes(data)
+        print(f"✓ Criado: {file_path}")
+    _PENDING.clear()
 
 def main():
     base_dir = Path(__file__).parent
     
     # 1. Arquivos de configuração raiz
-    create_file(base_dir / "requirements.txt", """httpx==0.27.0
+    create_file(base_dir / "requirements.txt", b"""httpx==0.27.0
 pydantic==2.9.2
 python-dotenv==1.0.1
 rich==13.9.2
@@ -34,7 +48,7 @@ AMADEUS_CLIENT_SECRET=coloque_seu_client_secret_aqui
 DEFAULT_CURRENCY=EUR
 DEFAULT_LOCALE=pt-PT""")
 
-    create_file(base_dir / ".gitignore", """.env
+    create_file(base_dir / ".gitignore", b""".env
 __pycache__/
 *.pyc
 *.pyo
@@ -68,11 +82,11 @@ MANIFEST
 Thumbs.db""")
 
     # 2. Estrutura de pacotes
-    create_file(base_dir / "src" / "__init__.py", "")
-    create_file(base_dir / "src" / "flight_ticker" / "__init__.py", "")
+    create_file(base_dir / "src" / "__init__.py", b"")
+    create_file(base_dir / "src" / "flight_ticker" / "__init__.py", b"")
     
     # 3. Core - Domain Models (Clean Architecture)
-    create_file(base_dir / "src" / "flight_ticker" / "domain" / "__init__.py", "")
+    create_file(base_dir / "src" / "flight_ticker" / "domain" / "__init__.py", b"")
     create_file(base_dir / "src" / "flight_ticker" / "domain" / "models.py", '''"""
 Domain Models - Entidades de negócio puras
 """
@@ -165,7 +179,7 @@ class SearchResult(BaseModel):
 ''')
 
     # 4. Application Services (Use Cases)
-    create_file(base_dir / "src" / "flight_ticker" / "application" / "__init__.py", "")
+    create_file(base_dir / "src" / "flight_ticker" / "application" / "__init__.py", b"")
     create_file(base_dir / "src" / "flight_ticker" / "application" / "interfaces.py", '''"""
 Interfaces/Contratos para Application Layer
 """
@@ -287,7 +301,7 @@ class FlightSearchService:
 ''')
 
     # 5. Infrastructure - Providers
-    create_file(base_dir / "src" / "flight_ticker" / "infrastructure" / "__init__.py", "")
+    create_file(base_dir / "src" / "flight_ticker" / "infrastructure" / "__init__.py", b"")
     create_file(base_dir / "src" / "flight_ticker" / "infrastructure" / "config.py", '''"""
 Configuração da aplicação
 """
@@ -322,7 +336,7 @@ class Config:
         return bool(cls.AMADEUS_CLIENT_ID and cls.AMADEUS_CLIENT_SECRET)
 ''')
 
-    create_file(base_dir / "src" / "flight_ticker" / "infrastructure" / "providers" / "__init__.py", "")
+    create_file(base_dir / "src" / "flight_ticker" / "infrastructure" / "providers" / "__init__.py", b"")
     create_file(base_dir / "src" / "flight_ticker" / "infrastructure" / "providers" / "kiwi_provider.py", '''"""
 Provedor Kiwi/Tequila API
 """
@@ -579,7 +593,7 @@ class AmadeusProvider:
 ''')
 
     # 6. AI/Scoring Service
-    create_file(base_dir / "src" / "flight_ticker" / "infrastructure" / "ai" / "__init__.py", "")
+    create_file(base_dir / "src" / "flight_ticker" / "infrastructure" / "ai" / "__init__.py", b"")
     create_file(base_dir / "src" / "flight_ticker" / "infrastructure" / "ai" / "scoring_service.py", '''"""
 Serviço de pontuação inteligente de ofertas
 """
@@ -679,7 +693,7 @@ class AIFlightScoringService(ScoringServiceInterface):
 ''')
 
     # 7. Strategies
-    create_file(base_dir / "src" / "flight_ticker" / "infrastructure" / "strategies" / "__init__.py", "")
+    create_file(base_dir / "src" / "flight_ticker" / "infrastructure" / "strategies" / "__init__.py", b"")
     create_file(base_dir / "src" / "flight_ticker" / "infrastructure" / "strategies" / "flexible_dates.py", '''"""
 Estratégia de datas flexíveis
 """
@@ -1016,7 +1030,7 @@ class FlightSearchServiceFactory:
 ''')
 
     # 9. Interface CLI atualizada
-    create_file(base_dir / "src" / "flight_ticker" / "presentation" / "__init__.py", "")
+    create_file(base_dir / "src" / "flight_ticker" / "presentation" / "__init__.py", b"")
     create_file(base_dir / "src" / "flight_ticker" / "presentation" / "cli.py", '''"""
 Interface de linha de comando
 """
@@ -1218,6 +1232,8 @@ if __name__ == "__main__":
     main()
 ''')
 
+    _flush()
+
     print("\n🎉 Estrutura do projeto criada com sucesso!")
     print("\n📁 Estrutura criada:")
     print("""
@@ -14,8 +14,9 @@ if SRC_DIR not in sys.path:
 
 from flight_ticker.infrastructure.providers.amadeus_provider import AmadeusProvider
 from flight_ticker.infrastructure.config import Config
+from flight_ticker.infrastructure.http_client import aclose_client
 from flight_ticker.domain.models import SearchCriteria
-import httpx
+import orjson
 
 
 async def main():
@@ -23,11 +24,13 @@ async def main():
     print("Config Amadeus:", bool(cfg.AMADEUS_CLIENT_ID), bool(cfg.AMADEUS_CLIENT_SECRET))
 
     provider = AmadeusProvider(cfg)
-    # Diagnóstico detalhado do token
-    print("\nTestando obtenção de token direto (diagnóstico):")
-    try:
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.post(
+    # Token via provedor: reutiliza o mesmo pool de conexões da busca abaixo
+    print("\nTestando obtenção de token (provedor):")
+    token = await provider._get_access_token()
+    if not token:
+        # Diagnóstico detalhado apenas em caso de falha
+        try:
+            resp = await provider._get_client().post(
                 f"{cfg.get_amadeus_base_url()}/v1/security/oauth2/token",
                 data={
                     "grant_type": "client_credentials",
@@ -35,16 +38,15 @@ async def main():
                     "client_secret": cfg.AMADEUS_CLIENT_SECRET,
                 },
                 headers={"Content-Type": "application/x-www-form-urlencoded"},
+                timeout=15,
             )
             print("Status:", resp.status_code)
             try:
-                print("Resposta:", resp.json())
+                print("Resposta:", orjson.loads(resp.content))
             except Exception:
                 print("Resposta (texto):", resp.text)
-            token = resp.json().get("access_token") if resp.headers.get("content-type", "").startswith("application/json") else None
-    except Exception as e:
-        print("Erro de rede ao obter token:", e)
-        token = None
+        except Exception as e:
+            print("Erro de rede ao obter token:", e)
     print("Token:", "OK" if token else "None")
 
     # Teste de busca simples: RIO -> MVD em 2025-12-15
@@ -61,6 +63,8 @@ async def main():
     for i, offer in enumerate(offers[:5], start=1):
         print(f"{i}. {offer.provider} {offer.currency} {offer.price_total:.2f} {offer.route_summary}")
 
+    await aclose_client()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
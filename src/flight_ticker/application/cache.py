@@ -0,0 +1,60 @@
+"""
+Cache de buscas por requisição - compartilha chamadas idênticas a provedores
+"""
+import asyncio
+from typing import Awaitable, Dict, List, Optional, Tuple
+
+from ..domain.models import SearchCriteria, FlightOffer
+from .interfaces import FlightProviderInterface
+
+
+class LegCache:
+    """Memoiza buscas de provedores durante uma única busca completa"""
+    
+    def __init__(self, currency: Optional[str] = None):
+        self._tasks: Dict[Tuple, asyncio.Future] = {}
+        # Menor preço já encontrado nesta busca, só na moeda dos critérios (permite às
+        # estratégias podar trabalho). Depende de quais estratégias já terminaram: o valor
+        # visto por uma estratégia em andamento varia entre execuções
+        self.currency = currency
+        self.best_price: float = float("inf")
+    
+    def update_best_price(self, offers: List[FlightOffer]) -> None:
+        """Atualiza o menor preço conhecido com ofertas já filtradas pelos critérios.
+
+        Sem moeda definida nos critérios os preços não são comparáveis e nada é registrado.
+        """
+        currency = self.currency
+        if currency is None:
+            return
+        for offer in offers:
+            if offer.currency == currency and offer.price_total < self.best_price:
+                self.best_price = offer.price_total
+    
+    def search(self, provider: FlightProviderInterface, criteria: SearchCriteria) -> Awaitable[List[FlightOffer]]:
+        """Retorna a busca em andamento (ou concluída) para o mesmo provedor e critérios"""
+        key = (provider.name, self._criteria_key(criteria))
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(provider.search(criteria))
+            self._tasks[key] = task
+        return task
+    
+    @staticmethod
+    def _criteria_key(criteria: SearchCriteria) -> Tuple:
+        """Chave hasheável com todos os campos que influenciam o resultado"""
+        return tuple(
+            tuple(value) if isinstance(value, list) else value
+            for value in criteria.__dict__.values()
+        )
+
+
+def cached_search(
+    provider: FlightProviderInterface,
+    criteria: SearchCriteria,
+    cache: Optional[LegCache] = None
+) -> Awaitable[List[FlightOffer]]:
+    """Busca no provedor, reutilizando o cache quando disponível"""
+    if cache is None:
+        return provider.search(criteria)
+    return cache.search(provider, criteria)
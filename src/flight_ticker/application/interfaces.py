@@ -2,9 +2,12 @@
 Interfaces/Contratos para Application Layer
 """
 from abc import ABC, abstractmethod
-from typing import List, Protocol
+from typing import TYPE_CHECKING, List, Optional, Protocol
 from ..domain.models import SearchCriteria, FlightOffer
 
+if TYPE_CHECKING:
+    from .cache import LegCache
+
 
 class FlightProviderInterface(Protocol):
     """Interface para provedores de voo"""
@@ -28,6 +31,6 @@ class SearchStrategyInterface(ABC):
     """Interface para estratégias de busca"""
     
     @abstractmethod
-    async def execute(self, criteria: SearchCriteria) -> List[FlightOffer]:
-        """Executa a estratégia de busca"""
+    async def execute(self, criteria: SearchCriteria, cache: Optional["LegCache"] = None) -> List[FlightOffer]:
+        """Executa a estratégia de busca (cache compartilha buscas repetidas entre estratégias)"""
         pass
@@ -2,10 +2,12 @@
 Application Services - Casos de uso principais
 """
 import asyncio
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from operator import itemgetter
 
 from ..domain.models import SearchCriteria, FlightOffer, SearchResult
+from .cache import LegCache
 from .interfaces import FlightProviderInterface, ScoringServiceInterface, SearchStrategyInterface
 
 
@@ -24,25 +26,34 @@ class FlightSearchService:
     
     async def search(self, criteria: SearchCriteria) -> SearchResult:
         """Executa busca completa com todas as estratégias"""
-        all_offers: List[FlightOffer] = []
+        # Assinatura -> (posição, oferta): posição = (índice da estratégia, índice na lista),
+        # para que a ordem de término das estratégias não decida qual duplicata fica
+        unique_offers: Dict[Tuple, Tuple[Tuple[int, int], FlightOffer]] = {}
+        max_price = criteria.max_price or None
+        max_stops = criteria.max_stops
         
-        # Executa todas as estratégias em paralelo
-        strategy_tasks = [strategy.execute(criteria) for strategy in self._strategies]
-        strategy_results = await asyncio.gather(*strategy_tasks, return_exceptions=True)
+        # Executa todas as estratégias em paralelo, compartilhando buscas idênticas
+        cache = LegCache(criteria.preferred_currency)
+        strategy_tasks = [
+            self._execute_indexed(index, strategy, criteria, cache)
+            for index, strategy in enumerate(self._strategies)
+        ]
         
-        # Coleta resultados válidos
-        for result in strategy_results:
-            if isinstance(result, list):
-                all_offers.extend(result)
+        # Filtra e remove duplicatas à medida que cada estratégia termina
+        for next_result in asyncio.as_completed(strategy_tasks):
+            try:
+                index, offers = await next_result
+            except Exception:
+                continue
+            # Só ofertas que passam nos filtros contam como "já encontradas" para as demais
+            accepted = self._add_unique_offers(index, offers, unique_offers, max_price, max_stops)
+            cache.update_best_price(accepted)
         
-        # Remove duplicatas
-        unique_offers = self._deduplicate_offers(all_offers)
-        
-        # Aplica filtros finais
-        filtered_offers = self._apply_filters(unique_offers, criteria)
+        # Ordem das estratégias (como em gather), independente de quem terminou primeiro
+        ordered = sorted(unique_offers.values(), key=itemgetter(0))
         
         # Pontua e ordena
-        scored_offers = self._scoring_service.score_offers(filtered_offers)
+        scored_offers = self._scoring_service.score_offers([offer for _, offer in ordered])
         
         return SearchResult(
             offers=scored_offers,
@@ -51,33 +62,55 @@ class FlightSearchService:
             total_found=len(scored_offers)
         )
     
-    def _deduplicate_offers(self, offers: List[FlightOffer]) -> List[FlightOffer]:
-        """Remove ofertas duplicadas"""
-        seen = set()
-        unique = []
-        
-        for offer in offers:
-            # Cria assinatura única baseada em rota e preço
-            signature = (
-                offer.provider,
-                offer.route_summary,
-                round(offer.price_total, 2)
-            )
-            
-            if signature not in seen:
-                seen.add(signature)
-                unique.append(offer)
-        
-        return unique
+    @staticmethod
+    async def _execute_indexed(
+        index: int,
+        strategy: SearchStrategyInterface,
+        criteria: SearchCriteria,
+        cache: LegCache
+    ) -> Tuple[int, List[FlightOffer]]:
+        """Executa a estratégia devolvendo também seu índice (as_completed não preserva a ordem)"""
+        return index, await strategy.execute(criteria, cache)
     
-    def _apply_filters(self, offers: List[FlightOffer], criteria: SearchCriteria) -> List[FlightOffer]:
-        """Aplica filtros baseados nos critérios"""
-        filtered = offers
-        
-        if criteria.max_price:
-            filtered = [o for o in filtered if o.price_total <= criteria.max_price]
+    def _add_unique_offers(
+        self,
+        strategy_index: int,
+        offers: List[FlightOffer],
+        unique: Dict[Tuple, Tuple[Tuple[int, int], FlightOffer]],
+        max_price: Optional[float] = None,
+        max_stops: Optional[int] = None
+    ) -> List[FlightOffer]:
+        """Acrescenta a unique as ofertas dentro dos filtros; entre assinaturas iguais fica a
+        da primeira estratégia (e a primeira dentro dela), como se fossem processadas em ordem.
+
+        Retorna as ofertas que passaram nos filtros (inclusive duplicatas).
+        """
+        signature = self._signature
+        accepted: List[FlightOffer] = []
         
-        if criteria.max_stops is not None:
-            filtered = [o for o in filtered if o.total_stops <= criteria.max_stops]
+        for position, offer in enumerate(offers):
+            # Filtros antes da assinatura; len(segments) - 1 evita o descritor de total_stops
+            if max_price is not None and offer.price_total > max_price:
+                continue
+            if max_stops is not None and len(offer.segments) - 1 > max_stops:
+                continue
+            key = signature(offer)
+            rank = (strategy_index, position)
+            current = unique.get(key)
+            if current is None or rank < current[0]:
+                unique[key] = (rank, offer)
+            accepted.append(offer)
         
-        return filtered
+        return accepted
+    
+    @staticmethod
+    def _signature(offer: FlightOffer) -> Tuple:
+        """Assinatura única baseada em provedor, preço (centavos inteiros), moeda e trechos da rota"""
+        # A própria tupla é a chave (o dict compara igualdade, sem perder ofertas por colisão
+        # de hash); trechos ordenados, sem montar a string de route_summary
+        return (
+            offer.provider,
+            tuple((seg.origin, seg.destination) for seg in offer.segments),
+            round(offer.price_total * 100),
+            offer.currency,
+        )
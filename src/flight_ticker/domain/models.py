@@ -1,11 +1,21 @@
 """
 Domain Models - Entidades de negócio puras
 """
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from functools import cached_property
+from typing import List, Optional, Tuple
+from pydantic import BaseModel, Field, PrivateAttr
 from datetime import datetime
 
 
+# Classes de cabine conhecidas -> índice inteiro (0 = não informada/desconhecida)
+CABIN_CLASS_INDEX = {
+    "ECONOMY": 1,
+    "PREMIUM_ECONOMY": 2,
+    "BUSINESS": 3,
+    "FIRST": 4,
+}
+
+
 class FlightSegment(BaseModel):
     """Segmento de voo individual"""
     origin: str = Field(..., description="IATA código origem")
@@ -33,19 +43,39 @@ class FlightOffer(BaseModel):
     ai_score: Optional[float] = None
     ai_explanation: Optional[str] = None
     
+    # Caches dos valores derivados (segments não muda após a construção)
+    _route_cache: Optional[str] = PrivateAttr(default=None)
+    _stops_cache: Optional[int] = PrivateAttr(default=None)
+    _cabin_index_cache: Optional[int] = PrivateAttr(default=None)
+    
     @property
     def total_stops(self) -> int:
         """Número total de paradas"""
-        return max(0, len(self.segments) - 1)
+        if self._stops_cache is None:
+            self._stops_cache = max(0, len(self.segments) - 1)
+        return self._stops_cache
+    
+    @property
+    def cabin_index(self) -> int:
+        """Índice inteiro da classe de cabine (ver CABIN_CLASS_INDEX)"""
+        if self._cabin_index_cache is None:
+            cabin = self.cabin_class
+            self._cabin_index_cache = CABIN_CLASS_INDEX.get(cabin.upper(), 0) if cabin else 0
+        return self._cabin_index_cache
+    
+    @property
+    def route_key(self) -> Tuple[str, ...]:
+        """Rota como tupla de códigos IATA (origem, destinos...)"""
+        if not self.segments:
+            return ()
+        return (self.segments[0].origin, *(seg.destination for seg in self.segments))
     
     @property
     def route_summary(self) -> str:
         """Resumo da rota"""
-        if not self.segments:
-            return ""
-        origins = [self.segments[0].origin]
-        destinations = [seg.destination for seg in self.segments]
-        return " → ".join(origins + destinations)
+        if self._route_cache is None:
+            self._route_cache = " → ".join(self.route_key)
+        return self._route_cache
 
 
 class SearchCriteria(BaseModel):
@@ -68,6 +98,10 @@ class SearchCriteria(BaseModel):
     def is_round_trip(self) -> bool:
         """Verifica se é ida e volta"""
         return self.return_dates is not None and len(self.return_dates) > 0
+    
+    def with_overrides(self, **overrides) -> "SearchCriteria":
+        """Cópia rasa com campos substituídos, sem revalidar (campos já validados)"""
+        return SearchCriteria.model_construct(**{**self.__dict__, **overrides})
 
 
 class SearchResult(BaseModel):
@@ -77,16 +111,25 @@ class SearchResult(BaseModel):
     search_timestamp: datetime
     total_found: int
     
+    @cached_property
+    def _best_and_cheapest(self) -> Tuple[Optional[FlightOffer], Optional[FlightOffer]]:
+        """Melhor e mais barata oferta, calculadas em uma única passada"""
+        best, best_score = None, -1.0
+        cheapest, cheapest_price = None, float("inf")
+        for offer in self.offers:
+            score = offer.ai_score or 0.0
+            if score > best_score:
+                best, best_score = offer, score
+            if offer.price_total < cheapest_price:
+                cheapest, cheapest_price = offer, offer.price_total
+        return best, cheapest
+    
     @property
     def best_offer(self) -> Optional[FlightOffer]:
         """Melhor oferta por score de IA ou preço"""
-        if not self.offers:
-            return None
-        return max(self.offers, key=lambda x: x.ai_score or 0.0)
+        return self._best_and_cheapest[0]
     
     @property
     def cheapest_offer(self) -> Optional[FlightOffer]:
         """Oferta mais barata"""
-        if not self.offers:
-            return None
-        return min(self.offers, key=lambda x: x.price_total)
+        return self._best_and_cheapest[1]
@@ -2,7 +2,7 @@
 Serviço de pontuação inteligente de ofertas
 """
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import List, Tuple
 from ...domain.models import FlightOffer
 from ...application.interfaces import ScoringServiceInterface
 
@@ -10,47 +10,61 @@ from ...application.interfaces import ScoringServiceInterface
 class AIFlightScoringService(ScoringServiceInterface):
     """Serviço de pontuação usando heurísticas inteligentes"""
     
+    # Fatores por classe, indexados por FlightOffer.cabin_index
+    CABIN_FACTORS = np.array([
+        1.0,   # Desconhecida/não informada
+        1.05,  # Leve bônus para economia
+        0.98,  # Leve penalidade (mais caro)
+        0.90,  # Penalidade maior
+        0.85,  # Maior penalidade
+    ])
+    
     def score_offers(self, offers: List[FlightOffer]) -> List[FlightOffer]:
         """Pontua e ordena ofertas por valor geral"""
         if not offers:
             return offers
         
-        # Calcula preço de referência (mediana)
-        prices = [o.price_total for o in offers]
-        reference_price = float(np.median(prices))
+        scores, prices = self._calculate_scores(offers)
         
-        # Pontua cada oferta
-        scored_offers = []
-        for offer in offers:
-            score, explanation = self._calculate_score(offer, reference_price)
+        # Atribui score e explicação a cada oferta
+        for offer, score in zip(offers, scores.tolist()):
             offer.ai_score = score
-            offer.ai_explanation = explanation
-            scored_offers.append(offer)
+            offer.ai_explanation = self._build_explanation(offer, score)
         
         # Ordena por score (maior primeiro) e desempata por preço (menor primeiro)
-        return sorted(
-            scored_offers,
-            key=lambda x: (-x.ai_score if x.ai_score else 0.0, x.price_total)
-        )
+        order = np.lexsort((prices, -scores))
+        return [offers[i] for i in order.tolist()]
     
-    def _calculate_score(self, offer: FlightOffer, reference_price: float) -> Tuple[float, str]:
-        """Calcula score individual da oferta"""
+    def _calculate_scores(self, offers: List[FlightOffer]) -> Tuple[np.ndarray, np.ndarray]:
+        """Calcula os scores de todas as ofertas de forma vetorizada (retorna scores e preços)"""
+        # Matriz (N, F) de atributos montada em uma única passada pelas ofertas
+        features = np.array(
+            [
+                (o.price_total, len(o.segments), o.baggage_included, o.cabin_index)
+                for o in offers
+            ],
+            dtype=np.float64,
+        )
+        prices, segments, baggage, cabins = features.T
+        stops = np.maximum(segments - 1.0, 0.0)
+        
+        # Preço de referência (mediana)
+        reference_price = self._median(prices)
         
-        # 1. Fator preço (melhor se menor que referência)
-        price_factor = reference_price / max(offer.price_total, 1e-6)
-        price_factor = min(price_factor, 2.0)  # Cap em 2x
+        # 1. Fator preço (melhor se menor que referência), cap em 2x
+        price_factor = np.minimum(reference_price / np.maximum(prices, 1e-6), 2.0)
         
         # 2. Penalidade por paradas
-        stops_penalty = 1.0 / (1.0 + 0.4 * offer.total_stops)
+        stops_penalty = 1.0 / (1.0 + 0.4 * stops)
         
         # 3. Bônus bagagem incluída
-        baggage_bonus = 1.1 if offer.baggage_included else 1.0
+        baggage_bonus = np.where(baggage > 0.0, 1.1, 1.0)
         
         # 4. Fator classe de cabine
-        cabin_factor = self._get_cabin_factor(offer.cabin_class)
+        cabin_factor = np.take(self.CABIN_FACTORS, cabins.astype(np.intp))
         
         # 5. Penalidade por muitos segmentos (complexidade)
-        complexity_penalty = 1.0 / (1.0 + 0.1 * max(0, len(offer.segments) - 2))
+        complexity_penalty = 1.0 / (1.0 + 0.1 * np.maximum(segments - 2.0, 0.0))
         
         # Score final
         raw_score = (
@@ -62,26 +76,17 @@ class AIFlightScoringService(ScoringServiceInterface):
         )
         
         # Normaliza para 0-100
-        score = float(np.clip(raw_score * 35.0, 0.0, 100.0))
-        
-        # Explicação
-        explanation = self._build_explanation(offer, score)
-        
-        return score, explanation
+        return np.clip(raw_score * 35.0, 0.0, 100.0), prices
     
-    def _get_cabin_factor(self, cabin_class: Optional[str]) -> float:
-        """Fator baseado na classe de cabine"""
-        if not cabin_class:
-            return 1.0
-        
-        factors = {
-            "ECONOMY": 1.05,        # Leve bônus para economia
-            "PREMIUM_ECONOMY": 0.98, # Leve penalidade (mais caro)
-            "BUSINESS": 0.90,       # Penalidade maior
-            "FIRST": 0.85,          # Maior penalidade
-        }
-        
-        return factors.get(cabin_class.upper(), 1.0)
+    @staticmethod
+    def _median(values: np.ndarray) -> float:
+        """Mediana por seleção (np.partition) em vez de ordenação completa"""
+        k = values.size // 2
+        if values.size % 2:
+            return float(np.partition(values, k)[k])
+        # Tamanho par: média dos dois elementos centrais
+        part = np.partition(values, (k - 1, k))
+        return float((part[k - 1] + part[k]) / 2.0)
     
     def _build_explanation(self, offer: FlightOffer, score: float) -> str:
         """Constrói explicação do score"""
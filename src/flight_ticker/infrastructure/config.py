@@ -2,6 +2,7 @@
 Configuração da aplicação
 """
 import os
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -24,15 +25,32 @@ class Config:
     MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "10"))
     REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "30"))
     
+    # Flags derivadas, avaliadas uma única vez no carregamento da classe
+    _TEQUILA_CONFIGURED = bool(TEQUILA_API_KEY)
+    _AMADEUS_CONFIGURED = bool(AMADEUS_CLIENT_ID and AMADEUS_CLIENT_SECRET)
+    _AMADEUS_BASE_URL = "https://api.amadeus.com" if AMADEUS_ENV == "PRODUCTION" else "https://test.api.amadeus.com"
+    
+    _instance: Optional["Config"] = None
+    
+    def __new__(cls):
+        # Configuração é imutável após o carregamento: compartilha uma única instância
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
     @classmethod
     def is_tequila_configured(cls) -> bool:
-        return bool(cls.TEQUILA_API_KEY)
+        return cls._TEQUILA_CONFIGURED
     
     @classmethod
     def is_amadeus_configured(cls) -> bool:
-        return bool(cls.AMADEUS_CLIENT_ID and cls.AMADEUS_CLIENT_SECRET)
+        return cls._AMADEUS_CONFIGURED
 
     @classmethod
     def get_amadeus_base_url(cls) -> str:
         """Retorna a base URL da Amadeus conforme ambiente."""
-        return "https://api.amadeus.com" if cls.AMADEUS_ENV == "PRODUCTION" else "https://test.api.amadeus.com"
+        return cls._AMADEUS_BASE_URL
+
+
+# Instância compartilhada usada quando nenhuma configuração é injetada
+CONFIG = Config()
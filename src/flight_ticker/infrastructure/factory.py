@@ -1,8 +1,10 @@
 """
 Factory para criar instâncias configuradas dos serviços
 """
-from typing import List
-from .config import Config
+import asyncio
+from typing import List, Optional
+from .config import Config, CONFIG
+from .http_client import aclose_client
 from .providers.kiwi_provider import KiwiTequilaProvider
 from .providers.amadeus_provider import AmadeusProvider
 from .ai.scoring_service import AIFlightScoringService
@@ -16,11 +18,27 @@ from ..application.interfaces import FlightProviderInterface, ScoringServiceInte
 class FlightSearchServiceFactory:
     """Factory para criar o serviço de busca configurado"""
     
+    # Serviço compartilhado (provedores e pools de conexão) do processo
+    _service: Optional[FlightSearchService] = None
+    
+    @classmethod
+    def get_or_create(cls, config: Optional[Config] = None) -> FlightSearchService:
+        """Retorna o serviço compartilhado, criando-o na primeira chamada"""
+        if cls._service is None:
+            cls._service = cls.create(config)
+        return cls._service
+    
+    @classmethod
+    async def reset(cls) -> None:
+        """Descarta o serviço compartilhado e fecha o cliente HTTP do processo (ex: isolamento em testes)"""
+        cls._service = None
+        await aclose_client()
+    
     @staticmethod
-    def create(config: Config = None) -> FlightSearchService:
+    def create(config: Optional[Config] = None) -> FlightSearchService:
         """Cria uma instância completa do serviço de busca"""
         if config is None:
-            config = Config()
+            config = CONFIG
         
         # Cria provedores
         providers = FlightSearchServiceFactory._create_providers(config)
@@ -29,7 +47,7 @@ class FlightSearchServiceFactory:
         scoring_service = FlightSearchServiceFactory._create_scoring_service()
         
         # Cria estratégias
-        strategies = FlightSearchServiceFactory._create_strategies(providers)
+        strategies = FlightSearchServiceFactory._create_strategies(providers, config)
         
         return FlightSearchService(
             providers=providers,
@@ -42,11 +60,14 @@ class FlightSearchServiceFactory:
         """Cria lista de provedores disponíveis"""
         providers = []
         
+        # Limite global de requisições simultâneas, compartilhado por todos os provedores
+        semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_REQUESTS)
+        
         if config.is_tequila_configured():
-            providers.append(KiwiTequilaProvider(config))
+            providers.append(KiwiTequilaProvider(config, semaphore))
         
         if config.is_amadeus_configured():
-            providers.append(AmadeusProvider(config))
+            providers.append(AmadeusProvider(config, semaphore))
         
         return providers
     
@@ -56,13 +77,14 @@ class FlightSearchServiceFactory:
         return AIFlightScoringService()
     
     @staticmethod
-    def _create_strategies(providers: List[FlightProviderInterface]) -> List[SearchStrategyInterface]:
+    def _create_strategies(providers: List[FlightProviderInterface], config: Config) -> List[SearchStrategyInterface]:
         """Cria lista de estratégias de busca"""
         if not providers:
             return []
         
+        max_concurrent = config.MAX_CONCURRENT_REQUESTS
         return [
             FlexibleDatesStrategy(providers, days_range=3),
-            AlternativeAirportsStrategy(providers),
-            SplitTicketsStrategy(providers, max_combinations=15),
+            AlternativeAirportsStrategy(providers, max_concurrent=max_concurrent),
+            SplitTicketsStrategy(providers, max_combinations=15, max_concurrent=max_concurrent),
         ]
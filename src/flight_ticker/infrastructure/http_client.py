@@ -0,0 +1,44 @@
+"""
+Cliente HTTP compartilhado entre provedores
+"""
+from typing import Optional
+import httpx
+from .config import Config, CONFIG
+
+try:
+    import h2  # noqa: F401 - habilita HTTP/2 no httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# Conexões ociosas ficam abertas entre buscas (evita novo handshake TLS por host)
+KEEPALIVE_EXPIRY = 60.0
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client(config: Optional[Config] = None) -> httpx.AsyncClient:
+    """Cliente único do processo: um pool de conexões (HTTP/2 quando disponível) para todas as APIs"""
+    global _client
+    if _client is None:
+        config = config or CONFIG
+        max_concurrent = config.MAX_CONCURRENT_REQUESTS
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=config.REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=max_concurrent * 4,
+                max_keepalive_connections=max_concurrent * 2,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _client
+
+
+async def aclose_client() -> None:
+    """Fecha o cliente compartilhado (recriado sob demanda no próximo uso)"""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
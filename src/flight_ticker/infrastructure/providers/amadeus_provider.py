@@ -1,11 +1,72 @@
 """
 Provedor Amadeus API
 """
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from functools import lru_cache
+from urllib.parse import urlencode
 import httpx
-from typing import List, Optional
+import orjson
+from typing import Dict, List, Optional, Tuple
 from ...domain.models import SearchCriteria, FlightOffer, FlightSegment
 from ...application.interfaces import FlightProviderInterface
-from ..config import Config
+from ..config import Config, CONFIG
+from ..http_client import get_client
+
+
+# Sites de cias comuns na região (companhia única na oferta) -> modelo do link direto
+CARRIER_LINKS = {
+    # LATAM com parâmetros de busca
+    "LA": (
+        "https://www.latamairlines.com/br/pt/oferta-de-voos?"
+        "origin={origin}&destination={destination}&departureDate={dep_date}"
+        "{return_param}&adt={adults}&chd={children}&inf={infants}"
+    ),
+    # GOL - sem padrão público de deep link estável, usar página inicial
+    "G3": "https://www.voegol.com.br/",
+    # SKY - sem padrão público de deep link estável, usar página BR
+    "H2": "https://www.skyairline.com/br/pt",
+    "JA": "https://www.jetsmart.com/br/pt",
+    "J4": "https://www.jetsmart.com/br/pt",
+    "WJ": "https://www.jetsmart.com/br/pt",
+    "AV": "https://www.avianca.com/br/pt/",
+}
+
+# Cabeçalho do corpo pré-codificado do pedido de token
+_FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+@lru_cache(maxsize=8)
+def _bearer_headers(token: str) -> Dict[str, str]:
+    """Cabeçalho de autorização montado uma vez por token (não modificar o dict retornado)"""
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _date_pairs(depart_dates: List[str], return_dates: Optional[List[str]]) -> List[Tuple[str, Optional[str]]]:
+    """Par (ida, volta) por data de ida, já que a API não aceita intervalo de volta.
+
+    Listas do mesmo tamanho (datas flexíveis expandem ida e volta igualmente) são pareadas pela
+    mesma posição, preservando a duração da viagem; caso contrário cada ida usa a primeira volta
+    na mesma data ou depois. Pares com volta antes da ida são descartados.
+    """
+    if not return_dates:
+        return [(depart_date, None) for depart_date in depart_dates]
+    # Datas ISO ordenam como texto
+    if len(return_dates) == len(depart_dates):
+        return [
+            (depart_date, return_date)
+            for depart_date, return_date in zip(sorted(depart_dates), sorted(return_dates))
+            if return_date >= depart_date
+        ]
+    ordered_returns = sorted(return_dates)
+    pairs: List[Tuple[str, Optional[str]]] = []
+    for depart_date in depart_dates:
+        index = bisect_left(ordered_returns, depart_date)
+        if index < len(ordered_returns):
+            pairs.append((depart_date, ordered_returns[index]))
+    return pairs
 
 
 class AmadeusProvider:
@@ -13,10 +74,25 @@ class AmadeusProvider:
     
     name = "Amadeus"
     
-    def __init__(self, config: Config = Config()):
-        self._config = config
+    # Segundos de folga antes da expiração para renovar o token
+    TOKEN_EXPIRY_MARGIN = 60
+    
+    # Tokens compartilhados entre instâncias do processo: (base_url, client_id) -> (token, expira_em)
+    _TOKENS: Dict[Tuple[str, str], Tuple[str, float]] = {}
+    
+    def __init__(self, config: Optional[Config] = None, semaphore: Optional[asyncio.Semaphore] = None):
+        self._config = config or CONFIG
+        # Semáforo compartilhado limita requisições simultâneas entre todas as buscas
+        self._semaphore = semaphore or asyncio.Semaphore(self._config.MAX_CONCURRENT_REQUESTS)
         self._base_url = self._config.get_amadeus_base_url()
-        self._token_cache: Optional[str] = None
+        self._token_key = (self._base_url, self._config.AMADEUS_CLIENT_ID)
+        # Credenciais são fixas no processo: corpo do pedido de token codificado uma única vez
+        self._token_body = urlencode({
+            "grant_type": "client_credentials",
+            "client_id": self._config.AMADEUS_CLIENT_ID,
+            "client_secret": self._config.AMADEUS_CLIENT_SECRET,
+        }).encode()
+        self._token_lock = asyncio.Lock()
     
     async def search(self, criteria: SearchCriteria) -> List[FlightOffer]:
         """Busca ofertas via Amadeus API"""
@@ -27,57 +103,84 @@ class AmadeusProvider:
         if not token:
             return []
         
-        # Simplificação: usa apenas primeira data
-        depart_date = criteria.depart_dates[0]
-        return_date = criteria.return_dates[0] if criteria.return_dates else None
+        headers = _bearer_headers(token)
+        client = self._get_client()
+        # Parâmetros que dependem só dos critérios: montados uma vez para todas as datas
+        base_params = self._build_search_params(criteria)
         
-        params = self._build_search_params(criteria, depart_date, return_date)
-        headers = {"Authorization": f"Bearer {token}"}
-        
-        async with httpx.AsyncClient(timeout=self._config.REQUEST_TIMEOUT) as client:
-            try:
+        async def search_date(depart_date: str, return_date: Optional[str]) -> List[FlightOffer]:
+            params = {**base_params, "departureDate": depart_date}
+            if return_date:
+                params["returnDate"] = return_date
+            async with self._semaphore:
                 response = await client.get(
                     f"{self._base_url}/v2/shopping/flight-offers",
                     params=params,
                     headers=headers
                 )
-                response.raise_for_status()
-                data = response.json()
-                
-                return self._parse_response(data, criteria)
-                
-            except Exception:
-                return []
+            response.raise_for_status()
+            return self._parse_response(orjson.loads(response.content), criteria)
+        
+        # Token obtido uma vez antes; datas buscadas em paralelo (limitado pelo semáforo)
+        results = await asyncio.gather(
+            *(search_date(*pair) for pair in _date_pairs(criteria.depart_dates, criteria.return_dates)),
+            return_exceptions=True
+        )
+        
+        offers: List[FlightOffer] = []
+        for result in results:
+            if isinstance(result, list):
+                offers.extend(result)
+        
+        return offers
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Cliente HTTP do processo, reutilizado entre token e buscas (mesma conexão TLS)"""
+        return get_client(self._config)
     
     async def _get_access_token(self) -> Optional[str]:
-        """Obtém token de acesso OAuth2"""
-        if self._token_cache:
-            return self._token_cache
+        """Obtém token de acesso OAuth2 (reutilizado entre instâncias até perto de expirar)"""
+        token = self._cached_token()
+        if token:
+            return token
         
-        async with httpx.AsyncClient(timeout=15) as client:
+        # Evita que buscas concorrentes solicitem vários tokens ao mesmo tempo
+        async with self._token_lock:
+            token = self._cached_token()
+            if token:
+                return token
+            
+            client = self._get_client()
             try:
                 response = await client.post(
                     f"{self._base_url}/v1/security/oauth2/token",
-                    data={
-                        "grant_type": "client_credentials",
-                        "client_id": self._config.AMADEUS_CLIENT_ID,
-                        "client_secret": self._config.AMADEUS_CLIENT_SECRET,
-                    }
+                    content=self._token_body,
+                    headers=_FORM_HEADERS,
+                    timeout=15,
                 )
                 response.raise_for_status()
-                token = response.json().get("access_token")
-                self._token_cache = token
+                data = orjson.loads(response.content)
+                token = data.get("access_token")
+                if token:
+                    expires_at = time.monotonic() + int(data.get("expires_in", 1800))
+                    self._TOKENS[self._token_key] = (token, expires_at)
                 return token
                 
             except Exception:
                 return None
     
-    def _build_search_params(self, criteria: SearchCriteria, depart_date: str, return_date: Optional[str]) -> dict:
-        """Constrói parâmetros da requisição"""
+    def _cached_token(self) -> Optional[str]:
+        """Token compartilhado ainda válido (com margem de segurança), se houver"""
+        cached = self._TOKENS.get(self._token_key)
+        if cached and time.monotonic() < cached[1] - self.TOKEN_EXPIRY_MARGIN:
+            return cached[0]
+        return None
+    
+    def _build_search_params(self, criteria: SearchCriteria) -> dict:
+        """Constrói parâmetros da requisição comuns a todas as datas de partida"""
         params = {
             "originLocationCode": criteria.origin,
             "destinationLocationCode": criteria.destination,
-            "departureDate": depart_date,
             "adults": criteria.adults,
             "nonStop": criteria.max_stops == 0 if criteria.max_stops is not None else False,
             "currencyCode": criteria.preferred_currency or self._config.DEFAULT_CURRENCY,
@@ -87,17 +190,39 @@ class AmadeusProvider:
         if criteria.infants and criteria.infants > 0:
             params["infants"] = criteria.infants
         
-        if return_date:
-            params["returnDate"] = return_date
-        
         if criteria.cabin_class:
             params["travelClass"] = criteria.cabin_class
         
+        # Filtro de preço na própria API (inteiro, arredondado para cima; o parser refina)
+        if criteria.max_price:
+            params["maxPrice"] = math.ceil(criteria.max_price)
+        
         return params
     
+    @staticmethod
+    def _single_carrier(segments: List[FlightSegment]) -> Optional[str]:
+        """Companhia da oferta quando todos os segmentos informados são da mesma; senão None"""
+        single = None
+        for segment in segments:
+            carrier = segment.marketing_carrier
+            if not carrier:
+                continue
+            if single is None:
+                single = carrier
+            elif carrier != single:
+                return None
+        return single
+    
     def _parse_response(self, data: dict, criteria: SearchCriteria) -> List[FlightOffer]:
         """Converte resposta da API em ofertas"""
         offers = []
+        # Construtor ligado a variável local: chamado para cada segmento de cada oferta
+        make_segment = FlightSegment.model_construct
+        
+        # Partes fixas do link alternativo (Google Flights), montadas uma vez por resposta
+        hl = (criteria.locale or self._config.DEFAULT_LOCALE).replace('_', '-')
+        google_prefix = f"https://www.google.com/travel/flights?hl={hl}#flt="
+        google_suffix = f";c:{criteria.preferred_currency or self._config.DEFAULT_CURRENCY}"
         
         for offer_data in data.get("data", []):
             try:
@@ -124,27 +249,27 @@ class AmadeusProvider:
                     continue
 
                 segments = []
+                append_segment = segments.append
                 first_outbound_dep_date = None
                 return_dep_date = None
-                for itinerary in offer_data.get("itineraries", []):
-                    # Identifica data de partida do primeiro trecho de ida e, se existir, da volta
-                    if first_outbound_dep_date is None:
-                        first_seg = (itinerary.get("segments") or [{}])[0]
-                        dep_ts = (first_seg.get("departure") or {}).get("at")
-                        if dep_ts:
-                            first_outbound_dep_date = dep_ts[:10]
-                    else:
-                        # Considera segunda itinerary como retorno (quando ida e volta)
-                        first_seg = (itinerary.get("segments") or [{}])[0]
-                        dep_ts = (first_seg.get("departure") or {}).get("at")
+                for index, itinerary in enumerate(offer_data.get("itineraries", [])):
+                    itinerary_segments = itinerary.get("segments") or ()
+                    # Data de partida do primeiro trecho: 1ª itinerary = ida, 2ª = volta
+                    if index < 2 and itinerary_segments:
+                        dep_ts = (itinerary_segments[0].get("departure") or {}).get("at")
                         if dep_ts:
-                            return_dep_date = dep_ts[:10]
-                    for segment_data in itinerary.get("segments", []):
-                        segments.append(FlightSegment(
-                            origin=segment_data["departure"]["iataCode"],
-                            destination=segment_data["arrival"]["iataCode"],
-                            departure=segment_data["departure"]["at"],
-                            arrival=segment_data["arrival"]["at"],
+                            if index == 0:
+                                first_outbound_dep_date = dep_ts[:10]
+                            else:
+                                return_dep_date = dep_ts[:10]
+                    for segment_data in itinerary_segments:
+                        departure = segment_data["departure"]
+                        arrival = segment_data["arrival"]
+                        append_segment(make_segment(
+                            origin=departure["iataCode"],
+                            destination=arrival["iataCode"],
+                            departure=departure["at"],
+                            arrival=arrival["at"],
                             marketing_carrier=segment_data.get("carrierCode"),
                             flight_number=segment_data.get("number"),
                         ))
@@ -158,46 +283,29 @@ class AmadeusProvider:
                         origin = segments[0].origin
                         destination = segments[0].destination
                         dep_date = first_outbound_dep_date or (segments[0].departure[:10] if segments[0].departure else None)
-                        carriers = sorted({seg.marketing_carrier for seg in segments if seg.marketing_carrier})
-                        # Prepara link alternativo (Google Flights)
-                        hl = (criteria.locale or self._config.DEFAULT_LOCALE).replace('_', '-')
-                        currency = criteria.preferred_currency or self._config.DEFAULT_CURRENCY
-                        flt_param = f"{origin}.{destination}.{dep_date}" if (origin and destination and dep_date) else ""
-                        if return_dep_date and origin and destination and dep_date:
-                            flt_param = f"{origin}.{destination}.{dep_date}*{destination}.{origin}.{return_dep_date}"
-                        if flt_param:
-                            alt_link = (
-                                f"https://www.google.com/travel/flights?hl={hl}#flt={flt_param};c:{currency}"
-                            )
-                        # Preferir link direto da companhia quando houver uma única
+                        carrier = self._single_carrier(segments)
                         if origin and destination and dep_date:
-                            if len(carriers) == 1:
-                                code = carriers[0]
-                                # Mapear alguns sites de cias comuns na região
-                                adults = criteria.adults or 1
-                                children = criteria.children or 0
-                                infants = criteria.infants or 0
-                                if code == "LA":
-                                    # LATAM com parâmetros de busca
-                                    checkout_link = (
-                                        f"https://www.latamairlines.com/br/pt/oferta-de-voos?"
-                                        f"origin={origin}&destination={destination}&departureDate={dep_date}"
-                                        f"{f'&returnDate={return_dep_date}' if return_dep_date else ''}"
-                                        f"&adt={adults}&chd={children}&inf={infants}"
-                                    )
-                                elif code == "G3":
-                                    # GOL - sem padrão público de deep link estável, usar página inicial
-                                    checkout_link = "https://www.voegol.com.br/"
-                                elif code == "H2":
-                                    # SKY - sem padrão público de deep link estável, usar página BR
-                                    checkout_link = "https://www.skyairline.com/br/pt"
-                                elif code in ("JA", "J4", "WJ"):
-                                    checkout_link = "https://www.jetsmart.com/br/pt"
-                                elif code == "AV":
-                                    checkout_link = "https://www.avianca.com/br/pt/"
+                            # Link alternativo (Google Flights), com trecho de volta quando houver
+                            flt_param = f"{origin}.{destination}.{dep_date}"
+                            if return_dep_date:
+                                flt_param += f"*{destination}.{origin}.{return_dep_date}"
+                            alt_link = google_prefix + flt_param + google_suffix
+                            
+                            # Preferir link direto da companhia quando houver uma única
+                            template = CARRIER_LINKS.get(carrier) if carrier else None
+                            if template is not None:
+                                checkout_link = template.format(
+                                    origin=origin,
+                                    destination=destination,
+                                    dep_date=dep_date,
+                                    return_param=f"&returnDate={return_dep_date}" if return_dep_date else "",
+                                    adults=criteria.adults or 1,
+                                    children=criteria.children or 0,
+                                    infants=criteria.infants or 0,
+                                )
                             
                             # Caso não tenhamos link direto ou múltiplos carriers, usar o alternativo
-                            if not checkout_link and alt_link:
+                            if not checkout_link:
                                 checkout_link = alt_link
                 except Exception:
                     checkout_link = None
@@ -208,7 +316,7 @@ class AmadeusProvider:
                 if checkout_link and alt_link and checkout_link != alt_link:
                     notes_text = f"Alternativo: {alt_link}"
 
-                offers.append(FlightOffer(
+                offers.append(FlightOffer.model_construct(
                     provider=self.name,
                     price_total=price,
                     currency=price_info.get("currency", criteria.preferred_currency or self._config.DEFAULT_CURRENCY),
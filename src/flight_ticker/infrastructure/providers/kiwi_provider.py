@@ -1,11 +1,16 @@
 """
 Provedor Kiwi/Tequila API
 """
+import asyncio
+import math
 import httpx
-from typing import List, Optional
+import orjson
+from datetime import date
+from typing import List, Optional, Tuple
 from ...domain.models import SearchCriteria, FlightOffer, FlightSegment
 from ...application.interfaces import FlightProviderInterface
-from ..config import Config
+from ..config import Config, CONFIG
+from ..http_client import get_client
 
 
 class KiwiTequilaProvider:
@@ -13,8 +18,22 @@ class KiwiTequilaProvider:
     
     name = "Kiwi/Tequila"
     
-    def __init__(self, config: Config = Config()):
-        self._config = config
+    # Resultados pedidos por dia de partida e teto de "limit" aceito pela API
+    RESULTS_PER_DAY = 50
+    MAX_LIMIT = 1000
+    
+    # Classe de cabine -> código Kiwi
+    CABIN_MAP = {
+        "ECONOMY": "M",
+        "PREMIUM_ECONOMY": "W",
+        "BUSINESS": "C",
+        "FIRST": "F",
+    }
+    
+    def __init__(self, config: Optional[Config] = None, semaphore: Optional[asyncio.Semaphore] = None):
+        self._config = config or CONFIG
+        # Semáforo compartilhado limita requisições simultâneas entre todas as buscas
+        self._semaphore = semaphore or asyncio.Semaphore(self._config.MAX_CONCURRENT_REQUESTS)
         self._base_url = "https://api.tequila.kiwi.com/v2"
     
     async def search(self, criteria: SearchCriteria) -> List[FlightOffer]:
@@ -23,36 +42,51 @@ class KiwiTequilaProvider:
             return []
         
         offers: List[FlightOffer] = []
+        headers = {"apikey": self._config.TEQUILA_API_KEY}
+        client = self._get_client()
+        # Parâmetros que dependem só dos critérios: montados uma vez para todos os intervalos
+        base_params = self._build_search_params(criteria)
         
-        async with httpx.AsyncClient(timeout=self._config.REQUEST_TIMEOUT) as client:
-            for depart_date in criteria.depart_dates:
-                params = self._build_search_params(criteria, depart_date)
-                headers = {"apikey": self._config.TEQUILA_API_KEY}
-                
-                try:
-                    response = await client.get(
-                        f"{self._base_url}/search",
-                        params=params,
-                        headers=headers
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    offers.extend(self._parse_response(data, criteria))
-                    
-                except Exception as e:
-                    # Log error in production
-                    continue
+        async def search_range(date_from: str, date_to: str, days: int) -> List[FlightOffer]:
+            params = {
+                **base_params,
+                "date_from": date_from,
+                "date_to": date_to,
+                # Mesmo volume por dia de antes, respeitando o máximo da API
+                "limit": min(self.RESULTS_PER_DAY * days, self.MAX_LIMIT),
+            }
+            async with self._semaphore:
+                response = await client.get(
+                    f"{self._base_url}/search",
+                    params=params,
+                    headers=headers
+                )
+            response.raise_for_status()
+            return self._parse_response(orjson.loads(response.content), criteria)
+        
+        # Datas consecutivas (mês, datas flexíveis) viram uma única requisição por intervalo;
+        # os intervalos são buscados em paralelo (limitado pelo semáforo)
+        results = await asyncio.gather(
+            *(search_range(*date_range) for date_range in _date_ranges(criteria.depart_dates)),
+            return_exceptions=True
+        )
+        
+        for result in results:
+            # Log error in production
+            if isinstance(result, list):
+                offers.extend(result)
         
         return offers
     
-    def _build_search_params(self, criteria: SearchCriteria, depart_date: str) -> dict:
-        """Constrói parâmetros da requisição"""
+    def _get_client(self) -> httpx.AsyncClient:
+        """Cliente HTTP do processo, compartilhado com os demais provedores"""
+        return get_client(self._config)
+    
+    def _build_search_params(self, criteria: SearchCriteria) -> dict:
+        """Constrói parâmetros da requisição comuns a todos os intervalos de partida"""
         params = {
             "fly_from": criteria.origin,
             "fly_to": criteria.destination,
-            "date_from": depart_date,
-            "date_to": depart_date,
             "curr": criteria.preferred_currency or self._config.DEFAULT_CURRENCY,
             "locale": criteria.locale or self._config.DEFAULT_LOCALE,
             "adults": criteria.adults,
@@ -60,29 +94,30 @@ class KiwiTequilaProvider:
             "max_stopovers": criteria.max_stops if criteria.max_stops is not None else 10,
             "carry_on": 1 if criteria.carry_on_only else 0,
             "hold_bag": 1 if criteria.checked_bag else 0,
-            "limit": 50,
             "sort": "price",
         }
         
+        # Intervalo de volta cobre todas as datas pedidas (datas ISO ordenam como texto)
         if criteria.return_dates:
-            params["return_from"] = criteria.return_dates[0]
-            params["return_to"] = criteria.return_dates[0]
+            params["return_from"] = min(criteria.return_dates)
+            params["return_to"] = max(criteria.return_dates)
+        
+        # Filtro de preço na própria API (inteiro, arredondado para cima; o parser refina)
+        if criteria.max_price:
+            params["price_to"] = math.ceil(criteria.max_price)
         
         return params
     
     def _map_cabin_class(self, cabin_class: Optional[str]) -> str:
         """Mapeia classe de cabine para formato Kiwi"""
-        mapping = {
-            "ECONOMY": "M",
-            "PREMIUM_ECONOMY": "W", 
-            "BUSINESS": "C",
-            "FIRST": "F"
-        }
-        return mapping.get(cabin_class or "ECONOMY", "M")
+        return self.CABIN_MAP.get(cabin_class or "ECONOMY", "M")
     
     def _parse_response(self, data: dict, criteria: SearchCriteria) -> List[FlightOffer]:
         """Converte resposta da API em ofertas"""
         offers = []
+        seen = set()
+        # Construtor ligado a variável local: chamado para cada trecho de cada oferta
+        make_segment = FlightSegment.model_construct
         
         for item in data.get("data", []):
             try:
@@ -91,18 +126,33 @@ class KiwiTequilaProvider:
                 if criteria.max_price and price > criteria.max_price:
                     continue
                 
-                segments = []
-                for route in item.get("route", []):
-                    segments.append(FlightSegment(
+                routes = item.get("route", [])
+                segments = [
+                    make_segment(
                         origin=route.get("flyFrom"),
                         destination=route.get("flyTo"),
                         departure=route.get("local_departure"),
                         arrival=route.get("local_arrival"),
                         marketing_carrier=route.get("operating_carrier") or route.get("airline"),
-                        flight_number=route.get("operating_flight_no") or route.get("flight_no"),
-                    ))
+                        flight_number=_flight_number(route),
+                    )
+                    for route in routes
+                ]
+                
+                # Descarta duplicatas da própria resposta: preço e todos os trechos (ida e volta),
+                # já que os campos do item descrevem só a ida
+                signature = (
+                    round(price, 2),
+                    tuple(
+                        (segment.origin, segment.destination, segment.departure, segment.flight_number)
+                        for segment in segments
+                    ),
+                )
+                if signature in seen:
+                    continue
+                seen.add(signature)
                 
-                offers.append(FlightOffer(
+                offers.append(FlightOffer.model_construct(
                     provider=self.name,
                     price_total=price,
                     currency=item.get("currency", criteria.preferred_currency or self._config.DEFAULT_CURRENCY),
@@ -118,3 +168,30 @@ class KiwiTequilaProvider:
                 continue
         
         return offers
+
+
+def _flight_number(route: dict) -> Optional[str]:
+    """Número do voo do trecho como texto (model_construct não converte; Tequila envia int)"""
+    flight_no = route.get("operating_flight_no") or route.get("flight_no")
+    return str(flight_no) if flight_no is not None else None
+
+
+def _date_ranges(dates: List[str]) -> List[Tuple[str, str, int]]:
+    """Agrupa datas ISO em intervalos consecutivos: (primeira, última, quantidade de dias)"""
+    ranges: List[Tuple[str, str, int]] = []
+    start = previous = None
+    for ordinal in sorted({date.fromisoformat(d).toordinal() for d in dates}):
+        if previous is not None and ordinal == previous + 1:
+            previous = ordinal
+            continue
+        if start is not None:
+            ranges.append(_ordinal_range(start, previous))
+        start = previous = ordinal
+    if start is not None:
+        ranges.append(_ordinal_range(start, previous))
+    return ranges
+
+
+def _ordinal_range(first: int, last: int) -> Tuple[str, str, int]:
+    """Intervalo de ordinais como (data inicial, data final, dias)"""
+    return date.fromordinal(first).isoformat(), date.fromordinal(last).isoformat(), last - first + 1
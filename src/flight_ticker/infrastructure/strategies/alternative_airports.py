@@ -2,8 +2,10 @@
 Estratégia de aeroportos alternativos
 """
 import asyncio
-from typing import List, Set, Dict
+import itertools
+from typing import List, Dict, FrozenSet, Optional
 from ...domain.models import SearchCriteria, FlightOffer
+from ...application.cache import LegCache, cached_search
 from ...application.interfaces import SearchStrategyInterface, FlightProviderInterface
 
 
@@ -11,39 +13,44 @@ class AlternativeAirportsStrategy(SearchStrategyInterface):
     """Estratégia que busca em aeroportos alternativos"""
     
     # Mapeamento de grupos de aeroportos
-    AIRPORT_GROUPS: Dict[str, Set[str]] = {
-        "SAO": {"GRU", "CGH", "VCP"},  # São Paulo
-        "RIO": {"GIG", "SDU"},         # Rio de Janeiro
-        "LON": {"LHR", "LGW", "STN", "LTN", "LCY", "SEN"},  # Londres
-        "PAR": {"CDG", "ORY", "BVA"},  # Paris
-        "NYC": {"JFK", "EWR", "LGA"},  # Nova York
-        "MIL": {"MXP", "LIN", "BGY"},  # Milão
-        "ROM": {"FCO", "CIA"},         # Roma
-        "BER": {"BER", "SXF", "TXL"},  # Berlim
+    AIRPORT_GROUPS: Dict[str, FrozenSet[str]] = {
+        "SAO": frozenset({"GRU", "CGH", "VCP"}),  # São Paulo
+        "RIO": frozenset({"GIG", "SDU"}),         # Rio de Janeiro
+        "LON": frozenset({"LHR", "LGW", "STN", "LTN", "LCY", "SEN"}),  # Londres
+        "PAR": frozenset({"CDG", "ORY", "BVA"}),  # Paris
+        "NYC": frozenset({"JFK", "EWR", "LGA"}),  # Nova York
+        "MIL": frozenset({"MXP", "LIN", "BGY"}),  # Milão
+        "ROM": frozenset({"FCO", "CIA"}),         # Roma
+        "BER": frozenset({"BER", "SXF", "TXL"}),  # Berlim
     }
     
-    def __init__(self, providers: List[FlightProviderInterface]):
+    def __init__(self, providers: List[FlightProviderInterface], max_concurrent: int = 8):
         self._providers = providers
+        self._semaphore = asyncio.Semaphore(max_concurrent)
     
-    async def execute(self, criteria: SearchCriteria) -> List[FlightOffer]:
+    async def execute(self, criteria: SearchCriteria, cache: Optional[LegCache] = None) -> List[FlightOffer]:
         """Executa busca com aeroportos alternativos"""
         origin_airports = self._get_alternative_airports(criteria.origin)
         destination_airports = self._get_alternative_airports(criteria.destination)
         
+        # Sem alternativas em nenhum dos lados: a única combinação seria a original
+        if len(origin_airports) == 1 and len(destination_airports) == 1:
+            return []
+        
         # Cria combinações de busca
+        # Pula combinação original (já será buscada por outra estratégia)
+        original_pair = (criteria.origin, criteria.destination)
+        route_pairs = [
+            pair for pair in itertools.product(origin_airports, destination_airports)
+            if pair != original_pair
+        ]
+        
         search_tasks = []
-        for origin in origin_airports:
-            for destination in destination_airports:
-                # Pula combinação original (já será buscada por outra estratégia)
-                if origin == criteria.origin and destination == criteria.destination:
-                    continue
-                
-                alt_criteria = criteria.model_copy()
-                alt_criteria.origin = origin
-                alt_criteria.destination = destination
-                
-                for provider in self._providers:
-                    search_tasks.append(provider.search(alt_criteria))
+        for origin, destination in route_pairs:
+            alt_criteria = criteria.with_overrides(origin=origin, destination=destination)
+            
+            for provider in self._providers:
+                search_tasks.append(self._guarded_search(provider, alt_criteria, cache))
         
         # Executa buscas em paralelo
         if not search_tasks:
@@ -59,16 +66,31 @@ class AlternativeAirportsStrategy(SearchStrategyInterface):
         
         return all_offers
     
-    def _get_alternative_airports(self, airport_code: str) -> Set[str]:
+    async def _guarded_search(
+        self,
+        provider: FlightProviderInterface,
+        criteria: SearchCriteria,
+        cache: Optional[LegCache] = None
+    ) -> List[FlightOffer]:
+        """Busca limitada pelo semáforo para não saturar as APIs"""
+        async with self._semaphore:
+            return await cached_search(provider, criteria, cache)
+    
+    def _get_alternative_airports(self, airport_code: str) -> FrozenSet[str]:
         """Obtém aeroportos alternativos para um código"""
-        # Verifica se é um grupo conhecido
-        if airport_code in self.AIRPORT_GROUPS:
-            return self.AIRPORT_GROUPS[airport_code]
-        
-        # Verifica se o código está em algum grupo
-        for group_code, airports in self.AIRPORT_GROUPS.items():
-            if airport_code in airports:
-                return airports
-        
-        # Se não encontrou, retorna apenas o próprio aeroporto
-        return {airport_code}
+        # Grupo conhecido ou aeroporto membro de um grupo; senão, apenas o próprio aeroporto
+        return _REVERSE_INDEX.get(airport_code) or frozenset({airport_code})
+
+
+def _build_reverse_index(groups: Dict[str, FrozenSet[str]]) -> Dict[str, FrozenSet[str]]:
+    """Indexa cada código de cidade e de aeroporto para o seu grupo"""
+    index: Dict[str, FrozenSet[str]] = {}
+    for group_code, group in groups.items():
+        for airport in group:
+            index[airport] = group
+        index[group_code] = group
+    return index
+
+
+# Índice reverso aeroporto/cidade -> grupo, calculado uma única vez
+_REVERSE_INDEX = _build_reverse_index(AlternativeAirportsStrategy.AIRPORT_GROUPS)
@@ -1,9 +1,12 @@
 """
 Estratégia de datas flexíveis
 """
-from typing import List, Set
-from datetime import datetime, timedelta
+import asyncio
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from datetime import date
 from ...domain.models import SearchCriteria, FlightOffer
+from ...application.cache import LegCache, cached_search
 from ...application.interfaces import SearchStrategyInterface, FlightProviderInterface
 
 
@@ -14,30 +17,43 @@ class FlexibleDatesStrategy(SearchStrategyInterface):
         self._providers = providers
         self._days_range = days_range
     
-    async def execute(self, criteria: SearchCriteria) -> List[FlightOffer]:
+    async def execute(self, criteria: SearchCriteria, cache: Optional[LegCache] = None) -> List[FlightOffer]:
         """Executa busca com datas flexíveis"""
-        # Expande datas
-        expanded_criteria = criteria.model_copy()
-        expanded_criteria.depart_dates = self._expand_dates(criteria.depart_dates[0])
+        # Expande datas (cópia sem revalidação: os demais campos já foram validados)
+        expanded_criteria = criteria.with_overrides(
+            depart_dates=self._expand_dates(criteria.depart_dates[0]),
+            return_dates=(
+                self._expand_dates(criteria.return_dates[0])
+                if criteria.return_dates else criteria.return_dates
+            ),
+        )
         
-        if criteria.return_dates:
-            expanded_criteria.return_dates = self._expand_dates(criteria.return_dates[0])
+        # Busca em todos os provedores em paralelo
+        results = await asyncio.gather(
+            *(cached_search(provider, expanded_criteria, cache) for provider in self._providers),
+            return_exceptions=True
+        )
         
-        # Busca em todos os provedores
+        # Coleta ofertas válidas
         all_offers = []
-        for provider in self._providers:
-            offers = await provider.search(expanded_criteria)
-            all_offers.extend(offers)
+        for result in results:
+            if isinstance(result, list):
+                all_offers.extend(result)
         
         return all_offers
     
     def _expand_dates(self, base_date: str) -> List[str]:
         """Expande uma data base em um range"""
-        dt = datetime.strptime(base_date, "%Y-%m-%d")
-        dates = []
-        
-        for delta in range(-self._days_range, self._days_range + 1):
-            new_date = dt + timedelta(days=delta)
-            dates.append(new_date.strftime("%Y-%m-%d"))
-        
-        return sorted(set(dates))
+        return list(_expand_date_range(base_date, self._days_range))
+
+
+@lru_cache(maxsize=2048)
+def _expand_date_range(base_date: str, days_range: int) -> Tuple[str, ...]:
+    """Datas ISO de base_date - days_range a base_date + days_range (memoizado)"""
+    base = date.fromisoformat(base_date).toordinal()
+    fromordinal = date.fromordinal
+    # O range já é ordenado e sem repetições
+    return tuple(
+        fromordinal(base + delta).isoformat()
+        for delta in range(-days_range, days_range + 1)
+    )
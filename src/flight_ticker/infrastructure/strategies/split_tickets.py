@@ -2,61 +2,147 @@
 Estratégia de bilhetes separados via hubs
 """
 import asyncio
-from typing import List, Set, Tuple
-from ...domain.models import SearchCriteria, FlightOffer, FlightSegment
+import heapq
+import math
+from itertools import chain
+from operator import attrgetter
+from typing import Dict, FrozenSet, List, Tuple, Optional
+from ...domain.models import SearchCriteria, FlightOffer
+from ...application.cache import LegCache, cached_search
 from ...application.interfaces import SearchStrategyInterface, FlightProviderInterface
 
 
+# Chave de ordenação por preço (implementada em C)
+_price = attrgetter("price_total")
+
+# Aviso exibido em toda oferta de bilhetes separados
+SPLIT_TICKET_NOTES = "⚠️ BILHETES SEPARADOS: Verifique tempo de conexão e regras de bagagem. Risco de perda de conexão."
+
+
 class SplitTicketsStrategy(SearchStrategyInterface):
     """Estratégia que busca bilhetes separados via hubs principais"""
     
     # Principais hubs internacionais
-    MAJOR_HUBS = {
+    MAJOR_HUBS: FrozenSet[str] = frozenset({
         "LIS", "MAD", "IST", "CDG", "FRA", "LHR", "AMS", 
         "DOH", "DXB", "MUC", "ZRH", "BCN", "FCO", "ATH",
         "VIE", "CPH", "ARN", "HEL", "WAW"
+    })
+    
+    # Coordenadas (lat, lon) de hubs, aeroportos e códigos de cidade comuns
+    AIRPORT_COORDINATES: Dict[str, Tuple[float, float]] = {
+        # Hubs
+        "LIS": (38.77, -9.13), "MAD": (40.47, -3.56), "IST": (41.26, 28.74),
+        "CDG": (49.01, 2.55), "FRA": (50.03, 8.56), "LHR": (51.47, -0.45),
+        "AMS": (52.31, 4.76), "DOH": (25.27, 51.61), "DXB": (25.25, 55.36),
+        "MUC": (48.35, 11.79), "ZRH": (47.46, 8.55), "BCN": (41.30, 2.08),
+        "FCO": (41.80, 12.25), "ATH": (37.94, 23.94), "VIE": (48.11, 16.57),
+        "CPH": (55.62, 12.65), "ARN": (59.65, 17.92), "HEL": (60.32, 24.96),
+        "WAW": (52.17, 20.97),
+        # América do Sul
+        "SAO": (-23.55, -46.63), "GRU": (-23.43, -46.47), "CGH": (-23.63, -46.66),
+        "VCP": (-23.01, -47.13), "RIO": (-22.91, -43.17), "GIG": (-22.81, -43.25),
+        "SDU": (-22.91, -43.16), "BSB": (-15.87, -47.92), "CNF": (-19.63, -43.97),
+        "POA": (-29.99, -51.17), "REC": (-8.13, -34.92), "SSA": (-12.91, -38.33),
+        "FOR": (-3.78, -38.53), "MVD": (-34.84, -56.03), "EZE": (-34.82, -58.54),
+        "SCL": (-33.39, -70.79),
+        # América do Norte
+        "NYC": (40.71, -74.01), "JFK": (40.64, -73.78), "EWR": (40.69, -74.17),
+        "LGA": (40.78, -73.87), "MIA": (25.79, -80.29),
+        # Europa
+        "LON": (51.51, -0.13), "LGW": (51.15, -0.19), "STN": (51.89, 0.24),
+        "LTN": (51.87, -0.37), "LCY": (51.50, 0.05), "SEN": (51.57, 0.70),
+        "PAR": (48.86, 2.35), "ORY": (48.72, 2.38), "BVA": (49.45, 2.11),
+        "MIL": (45.46, 9.19), "MXP": (45.63, 8.72), "LIN": (45.45, 9.28),
+        "BGY": (45.67, 9.70), "ROM": (41.90, 12.50), "CIA": (41.80, 12.59),
+        "BER": (52.37, 13.50), "SXF": (52.38, 13.52), "TXL": (52.56, 13.29),
+        "OPO": (41.24, -8.68), "DUB": (53.42, -6.27), "BRU": (50.90, 4.48),
+        "GVA": (46.24, 6.11), "PRG": (50.10, 14.26),
     }
     
-    def __init__(self, providers: List[FlightProviderInterface], max_combinations: int = 20):
+    # Desvio máximo aceito: (origem->hub + hub->destino) / (origem->destino)
+    MAX_DETOUR_RATIO = 1.4
+    
+    # Ofertas mais baratas de cada trecho consideradas na combinação (K x K pares)
+    LEG_CANDIDATES = 5
+    
+    def __init__(self, providers: List[FlightProviderInterface], max_combinations: int = 20, max_concurrent: int = 8):
         self._providers = providers
         self._max_combinations = max_combinations
+        self._semaphore = asyncio.Semaphore(max_concurrent)
     
-    async def execute(self, criteria: SearchCriteria) -> List[FlightOffer]:
+    async def execute(self, criteria: SearchCriteria, cache: Optional[LegCache] = None) -> List[FlightOffer]:
         """Executa busca com bilhetes separados"""
         if criteria.is_round_trip():
             # Para ida e volta, a lógica seria mais complexa
             return []
         
-        # Gera combinações de hub
-        hub_combinations = self._generate_hub_combinations(criteria.origin, criteria.destination)
+        if self._already_satisfied(criteria, cache):
+            return []
         
-        # Limita combinações para evitar explosão
-        limited_combinations = list(hub_combinations)[:self._max_combinations]
+        # Gera apenas as melhores combinações de hub (evita explosão)
+        hub_combinations = self._generate_hub_combinations(
+            criteria.origin, criteria.destination, self._max_combinations
+        )
+        
+        # Busca todas as combinações em paralelo
+        results = await asyncio.gather(
+            *(
+                self._search_split_route(criteria, origin, hub, destination, cache)
+                for origin, hub, destination in hub_combinations
+            ),
+            return_exceptions=True
+        )
         
-        # Busca cada combinação
         split_offers = []
-        for origin, hub, destination in limited_combinations:
-            offers = await self._search_split_route(criteria, origin, hub, destination)
-            split_offers.extend(offers)
+        for result in results:
+            if isinstance(result, list):
+                split_offers.extend(result)
         
         return split_offers
     
-    def _generate_hub_combinations(self, origin: str, destination: str) -> Set[Tuple[str, str, str]]:
-        """Gera combinações de origem -> hub -> destino"""
-        combinations = set()
-        
-        for hub in self.MAJOR_HUBS:
-            if hub != origin and hub != destination:
-                combinations.add((origin, hub, destination))
+    def _generate_hub_combinations(
+        self, origin: str, destination: str, limit: int
+    ) -> List[Tuple[str, str, str]]:
+        """Gera até limit combinações de origem -> hub -> destino, das menores para as maiores distâncias"""
+        hubs = self.MAJOR_HUBS.difference((origin, destination))
+        
+        origin_coords = self.AIRPORT_COORDINATES.get(origin)
+        destination_coords = self.AIRPORT_COORDINATES.get(destination)
+        direct_km = (
+            _haversine_km(origin_coords, destination_coords)
+            if origin_coords and destination_coords else 0.0
+        )
         
-        return combinations
+        # Sem coordenadas conhecidas não há como podar: mantém todos os hubs
+        if direct_km < 1.0:
+            return [(origin, hub, destination) for hub in heapq.nsmallest(limit, hubs)]
+        
+        # Poda e ranqueia em uma única passada, sem montar a lista completa ordenada
+        coordinates = self.AIRPORT_COORDINATES
+        max_detour = self.MAX_DETOUR_RATIO
+        
+        def detours():
+            for hub in hubs:
+                hub_coords = coordinates.get(hub)
+                if hub_coords is None:
+                    continue
+                detour = (
+                    _haversine_km(origin_coords, hub_coords)
+                    + _haversine_km(hub_coords, destination_coords)
+                ) / direct_km
+                if detour <= max_detour:
+                    yield detour, hub
+        
+        return [(origin, hub, destination) for _, hub in heapq.nsmallest(limit, detours())]
     
     async def _search_split_route(
         self, 
         original_criteria: SearchCriteria, 
         origin: str, 
         hub: str, 
-        destination: str
+        destination: str,
+        cache: Optional[LegCache] = None
     ) -> List[FlightOffer]:
         """Busca uma rota específica dividida em dois trechos"""
         
@@ -64,78 +150,98 @@ class SplitTicketsStrategy(SearchStrategyInterface):
         depart_date = original_criteria.depart_dates[0]
         
         # Critérios para primeiro trecho (origem -> hub)
-        first_leg_criteria = original_criteria.model_copy()
-        first_leg_criteria.origin = origin
-        first_leg_criteria.destination = hub
-        first_leg_criteria.depart_dates = [depart_date]
-        first_leg_criteria.return_dates = None
+        first_leg_criteria = original_criteria.with_overrides(
+            origin=origin,
+            destination=hub,
+            depart_dates=[depart_date],
+            return_dates=None,
+        )
         
         # Critérios para segundo trecho (hub -> destino)
-        second_leg_criteria = original_criteria.model_copy()
-        second_leg_criteria.origin = hub
-        second_leg_criteria.destination = destination
-        second_leg_criteria.depart_dates = [depart_date]  # Simplificação: mesma data
-        second_leg_criteria.return_dates = None
-        
-        # Busca ambos os trechos em paralelo
-        first_leg_tasks = [provider.search(first_leg_criteria) for provider in self._providers]
-        second_leg_tasks = [provider.search(second_leg_criteria) for provider in self._providers]
-        
-        all_tasks = first_leg_tasks + second_leg_tasks
-        results = await asyncio.gather(*all_tasks, return_exceptions=True)
-        
-        # Separa resultados
-        first_leg_results = results[:len(first_leg_tasks)]
-        second_leg_results = results[len(first_leg_tasks):]
-        
-        # Coleta ofertas válidas
-        first_leg_offers = []
-        for result in first_leg_results:
-            if isinstance(result, list):
-                first_leg_offers.extend(result)
-        
-        second_leg_offers = []
-        for result in second_leg_results:
-            if isinstance(result, list):
-                second_leg_offers.extend(result)
+        second_leg_criteria = original_criteria.with_overrides(
+            origin=hub,
+            destination=destination,
+            depart_dates=[depart_date],  # Simplificação: mesma data
+            return_dates=None,
+        )
         
-        # Combina melhores ofertas de cada trecho
-        return self._combine_legs(first_leg_offers, second_leg_offers, original_criteria)
+        # Busca ambos os trechos em paralelo (limitado pelo semáforo entre combinações)
+        async with self._semaphore:
+            # Outra estratégia já achou oferta dentro do preço máximo: split não compensa
+            if self._already_satisfied(original_criteria, cache):
+                return []
+            
+            first_leg_tasks = [cached_search(provider, first_leg_criteria, cache) for provider in self._providers]
+            second_leg_tasks = [cached_search(provider, second_leg_criteria, cache) for provider in self._providers]
+            
+            all_tasks = first_leg_tasks + second_leg_tasks
+            results = await asyncio.gather(*all_tasks, return_exceptions=True)
+        
+        # Separa resultados e escolhe as K ofertas mais baratas de cada trecho
+        first_best = self._cheapest(results[:len(first_leg_tasks)], self.LEG_CANDIDATES)
+        second_best = self._cheapest(results[len(first_leg_tasks):], self.LEG_CANDIDATES)
+        
+        # Combina os melhores pares de cada trecho
+        return self._combine_legs(first_best, second_best, original_criteria)
+    
+    @staticmethod
+    def _already_satisfied(criteria: SearchCriteria, cache: Optional[LegCache]) -> bool:
+        """Verifica se uma oferta já encontrada (filtrada, na moeda dos critérios) atende ao preço máximo.
+
+        Considera apenas estratégias já concluídas: se o split roda ou é podado depende da ordem
+        de término, então os resultados podem variar entre execuções.
+        """
+        return bool(criteria.max_price) and cache is not None and cache.best_price <= criteria.max_price
+    
+    @staticmethod
+    def _cheapest(results: list, k: int) -> List[FlightOffer]:
+        """K ofertas mais baratas entre os resultados válidos, ordenadas por preço"""
+        offers = chain.from_iterable(result for result in results if isinstance(result, list))
+        return heapq.nsmallest(k, offers, key=_price)
     
     def _combine_legs(
         self, 
-        first_leg: List[FlightOffer], 
-        second_leg: List[FlightOffer],
+        first_best: List[FlightOffer], 
+        second_best: List[FlightOffer],
         original_criteria: SearchCriteria
     ) -> List[FlightOffer]:
-        """Combina ofertas de dois trechos em ofertas split"""
-        if not first_leg or not second_leg:
-            return []
-        
-        # Pega as melhores ofertas de cada trecho (por preço)
-        best_first = min(first_leg, key=lambda x: x.price_total)
-        best_second = min(second_leg, key=lambda x: x.price_total)
-        
-        # Calcula preço total
-        total_price = best_first.price_total + best_second.price_total
-        
-        # Verifica se está dentro do limite de preço
-        if original_criteria.max_price and total_price > original_criteria.max_price:
+        """Combina os pares K x K mais baratos de dois trechos em ofertas split, ordenadas por preço"""
+        if not first_best or not second_best:
             return []
         
-        # Combina segmentos
-        combined_segments = best_first.segments + best_second.segments
-        
-        # Cria oferta combinada
-        combined_offer = FlightOffer(
-            provider="SplitTickets",
-            price_total=total_price,
-            currency=best_first.currency,
-            baggage_included=best_first.baggage_included and best_second.baggage_included,
-            cabin_class=original_criteria.cabin_class,
-            segments=combined_segments,
-            booking_link=None,
-            notes="⚠️ BILHETES SEPARADOS: Verifique tempo de conexão e regras de bagagem. Risco de perda de conexão.",
-        )
-        
-        return [combined_offer]
+        # Limite de preço: o máximo informado, quando houver
+        limit = original_criteria.max_price or float("inf")
+        
+        combined: List[FlightOffer] = []
+        for first in first_best:
+            for second in second_best:
+                total_price = first.price_total + second.price_total
+                # Listas ordenadas por preço: os próximos pares deste trecho só ficam mais caros
+                if total_price > limit:
+                    break
+                
+                # Cria oferta combinada (segmentos já validados nas ofertas de origem)
+                combined.append(FlightOffer.model_construct(
+                    provider="SplitTickets",
+                    price_total=total_price,
+                    currency=first.currency,
+                    baggage_included=first.baggage_included and second.baggage_included,
+                    cabin_class=original_criteria.cabin_class,
+                    segments=[*first.segments, *second.segments],
+                    booking_link=None,
+                    notes=SPLIT_TICKET_NOTES,
+                ))
+        
+        combined.sort(key=_price)
+        return combined
+
+
+def _haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Distância de grande círculo entre dois pontos (lat, lon) em km"""
+    lat1, lon1 = map(math.radians, a)
+    lat2, lon2 = map(math.radians, b)
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
@@ -3,28 +3,139 @@ Interface de linha de comando
 """
 import asyncio
 import argparse
+import calendar
 from datetime import datetime
-from datetime import date, timedelta
-from typing import Optional
+from datetime import date
+from functools import lru_cache
+from typing import Optional, Tuple
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
+try:
+    import uvloop
+except ImportError:  # opcional (indisponível no Windows)
+    uvloop = None
+
 from ..domain.models import SearchCriteria
+from ..application.services import FlightSearchService
 from ..infrastructure.factory import FlightSearchServiceFactory
+from ..infrastructure.http_client import aclose_client
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Configura o parser de argumentos da linha de comando"""
+    parser = argparse.ArgumentParser(
+        description="FlightTicker - Busca inteligente de passagens aéreas",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  python -m src.main --origin SAO --destination NYC --depart 2025-02-15
+  python -m src.main --origin LON --destination PAR --depart 2025-01-10 --return 2025-01-15 --carry-on-only
+  python -m src.main --origin RIO --destination LIS --depart 2025-03-20 --max-price 2000 --no-ai
+        """
+    )
+
+    # Argumentos obrigatórios
+    parser.add_argument("--origin", required=True, 
+                      help="Código IATA origem ou grupo (ex: SAO, RIO, LON)")
+    parser.add_argument("--destination", required=True,
+                      help="Código IATA destino ou grupo (ex: PAR, NYC)")
+    # "--depart" ou "--month" são mutuamente exclusivos, ao menos um é obrigatório
+    mx = parser.add_mutually_exclusive_group(required=True)
+    mx.add_argument("--depart",
+                    help="Data partida YYYY-MM-DD")
+
+    # Argumentos opcionais
+    parser.add_argument("--return", dest="return_date",
+                      help="Data retorno YYYY-MM-DD (para ida e volta)")
+    parser.add_argument("--adults", type=int, default=1,
+                      help="Número de adultos (padrão: 1)")
+    parser.add_argument("--children", type=int, default=0,
+                      help="Número de crianças (2-11 anos)")
+    parser.add_argument("--infants", type=int, default=0,
+                      help="Número de bebês (0-1 ano, no colo)")
+    parser.add_argument("--cabin", 
+                      choices=["ECONOMY", "PREMIUM_ECONOMY", "BUSINESS", "FIRST"],
+                      help="Classe de cabine")
+    parser.add_argument("--max-stops", type=int,
+                      help="Número máximo de paradas")
+    parser.add_argument("--carry-on-only", action="store_true",
+                      help="Apenas bagagem de mão")
+    parser.add_argument("--checked-bag", action="store_true",
+                      help="Incluir bagagem despachada")
+    parser.add_argument("--max-price", type=float,
+                      help="Preço máximo")
+    parser.add_argument("--currency", 
+                      help="Moeda preferida (ex: EUR, USD, BRL)")
+    parser.add_argument("--locale",
+                      help="Locale (ex: pt-PT, en-US)")
+    parser.add_argument("--no-ai", action="store_true",
+                      help="Desativa ranqueamento por IA (ordena apenas por preço)")
+    parser.add_argument("--limit", type=int, default=20,
+                      help="Limite de ofertas exibidas (padrão: 20)")
+
+    # Abertura de links no navegador
+    parser.add_argument("--open-best", action="store_true",
+                      help="Abre os links (direto e alternativo) da melhor oferta")
+    parser.add_argument("--open-cheapest", action="store_true",
+                      help="Abre os links (direto e alternativo) da oferta mais barata")
+    parser.add_argument("--open-index", type=int,
+                      help="Abre os links (direto e alternativo) da oferta pelo índice exibido (1..limit)")
+
+    # Busca por mês inteiro (partida)
+    mx.add_argument("--month",
+                    help="Buscar o mês inteiro para partida (YYYY-MM)")
+    # Busca por mês inteiro (retorno)
+    parser.add_argument("--return-month",
+                      help="Buscar o mês inteiro para retorno (YYYY-MM)")
+
+    return parser
+
+
+@lru_cache(maxsize=512)
+def _expand_month_dates(year_month: str) -> Tuple[str, ...]:
+    """Todas as datas ISO de um mês (YYYY-MM), memoizado; formato inválido -> tupla vazia"""
+    try:
+        # int() aceita mês com um dígito (ex: 2025-2)
+        year, month = (int(part) for part in year_month.split("-"))
+        first = date(year, month, 1).toordinal()
+    except Exception:
+        # Fallback: se formato inválido, retorna vazio para evitar erro
+        return ()
+
+    # Intervalo de ordinais do mês inteiro (isoformat já é YYYY-MM-DD)
+    days_in_month = calendar.monthrange(year, month)[1]
+    fromordinal = date.fromordinal
+    return tuple(fromordinal(ordinal).isoformat() for ordinal in range(first, first + days_in_month))
+
+
+def _run_async(coro):
+    """Executa a corrotina no event loop do uvloop quando disponível"""
+    if uvloop is None:
+        return asyncio.run(coro)
+    # uvloop.run cobre Python < 3.11 (sem asyncio.Runner) e as versões recentes
+    return uvloop.run(coro)
+
+
+# Parser e console construídos uma única vez no carregamento do módulo
+_PARSER = _build_parser()
+_CONSOLE = Console()
 
 
 class FlightTickerCLI:
     """Interface CLI para o FlightTicker"""
     
     def __init__(self):
-        self.console = Console()
-        self.search_service = FlightSearchServiceFactory.create()
+        self.console = _CONSOLE
+        # Criado em run(), só depois de os argumentos serem válidos (--help não paga o custo)
+        self.search_service: Optional[FlightSearchService] = None
     
     def run(self):
         """Executa a interface CLI"""
         args = self._parse_arguments()
+        self.search_service = FlightSearchServiceFactory.get_or_create()
         
         # Cria critérios de busca
         criteria = self._build_search_criteria(args)
@@ -37,7 +148,7 @@ class FlightTickerCLI:
         ) as progress:
             task = progress.add_task("Buscando melhores ofertas...", total=None)
             
-            result = asyncio.run(self.search_service.search(criteria))
+            result = _run_async(self._search(criteria))
             
             progress.update(task, description="Busca concluída!")
         
@@ -50,74 +161,17 @@ class FlightTickerCLI:
             getattr(args, "open_index", None),
         )
     
+    async def _search(self, criteria: SearchCriteria):
+        """Executa a busca e fecha as conexões no mesmo event loop"""
+        try:
+            return await self.search_service.search(criteria)
+        finally:
+            # Único ponto que fecha o cliente HTTP compartilhado pelos provedores
+            await aclose_client()
+    
     def _parse_arguments(self) -> argparse.Namespace:
-        """Configura e processa argumentos da linha de comando"""
-        parser = argparse.ArgumentParser(
-            description="FlightTicker - Busca inteligente de passagens aéreas",
-            formatter_class=argparse.RawDescriptionHelpFormatter,
-            epilog="""
-Exemplos de uso:
-  python -m src.main --origin SAO --destination NYC --depart 2025-02-15
-  python -m src.main --origin LON --destination PAR --depart 2025-01-10 --return 2025-01-15 --carry-on-only
-  python -m src.main --origin RIO --destination LIS --depart 2025-03-20 --max-price 2000 --no-ai
-            """
-        )
-        
-        # Argumentos obrigatórios
-        parser.add_argument("--origin", required=True, 
-                          help="Código IATA origem ou grupo (ex: SAO, RIO, LON)")
-        parser.add_argument("--destination", required=True,
-                          help="Código IATA destino ou grupo (ex: PAR, NYC)")
-        # "--depart" ou "--month" são mutuamente exclusivos, ao menos um é obrigatório
-        mx = parser.add_mutually_exclusive_group(required=True)
-        mx.add_argument("--depart",
-                        help="Data partida YYYY-MM-DD")
-        
-        # Argumentos opcionais
-        parser.add_argument("--return", dest="return_date",
-                          help="Data retorno YYYY-MM-DD (para ida e volta)")
-        parser.add_argument("--adults", type=int, default=1,
-                          help="Número de adultos (padrão: 1)")
-        parser.add_argument("--children", type=int, default=0,
-                          help="Número de crianças (2-11 anos)")
-        parser.add_argument("--infants", type=int, default=0,
-                          help="Número de bebês (0-1 ano, no colo)")
-        parser.add_argument("--cabin", 
-                          choices=["ECONOMY", "PREMIUM_ECONOMY", "BUSINESS", "FIRST"],
-                          help="Classe de cabine")
-        parser.add_argument("--max-stops", type=int,
-                          help="Número máximo de paradas")
-        parser.add_argument("--carry-on-only", action="store_true",
-                          help="Apenas bagagem de mão")
-        parser.add_argument("--checked-bag", action="store_true",
-                          help="Incluir bagagem despachada")
-        parser.add_argument("--max-price", type=float,
-                          help="Preço máximo")
-        parser.add_argument("--currency", 
-                          help="Moeda preferida (ex: EUR, USD, BRL)")
-        parser.add_argument("--locale",
-                          help="Locale (ex: pt-PT, en-US)")
-        parser.add_argument("--no-ai", action="store_true",
-                          help="Desativa ranqueamento por IA (ordena apenas por preço)")
-        parser.add_argument("--limit", type=int, default=20,
-                          help="Limite de ofertas exibidas (padrão: 20)")
-
-        # Abertura de links no navegador
-        parser.add_argument("--open-best", action="store_true",
-                          help="Abre os links (direto e alternativo) da melhor oferta")
-        parser.add_argument("--open-cheapest", action="store_true",
-                          help="Abre os links (direto e alternativo) da oferta mais barata")
-        parser.add_argument("--open-index", type=int,
-                          help="Abre os links (direto e alternativo) da oferta pelo índice exibido (1..limit)")
-
-        # Busca por mês inteiro (partida)
-        mx.add_argument("--month",
-                        help="Buscar o mês inteiro para partida (YYYY-MM)")
-        # Busca por mês inteiro (retorno)
-        parser.add_argument("--return-month",
-                          help="Buscar o mês inteiro para retorno (YYYY-MM)")
-        
-        return parser.parse_args()
+        """Processa argumentos da linha de comando"""
+        return _PARSER.parse_args()
     
     def _build_search_criteria(self, args: argparse.Namespace) -> SearchCriteria:
         """Constrói critérios de busca a partir dos argumentos"""
@@ -154,26 +208,38 @@ Exemplos de uso:
 
     def _expand_month(self, year_month: str) -> list[str]:
         """Expande um mês (YYYY-MM) em todas as datas do mês."""
-        try:
-            yyyy, mm = year_month.split("-")
-            start = date(int(yyyy), int(mm), 1)
-        except Exception:
-            # Fallback: se formato inválido, retorna lista vazia para evitar erro
-            return []
-
-        # Calcula primeiro dia do próximo mês
-        if start.month == 12:
-            next_month = date(start.year + 1, 1, 1)
-        else:
-            next_month = date(start.year, start.month + 1, 1)
-
-        # Itera de start até next_month - 1 dia
-        dates: list[str] = []
-        cur = start
-        while cur < next_month:
-            dates.append(cur.strftime("%Y-%m-%d"))
-            cur = cur + timedelta(days=1)
-        return dates
+        return list(_expand_month_dates(year_month))
+    
+    @staticmethod
+    def _format_carriers(offer) -> Optional[str]:
+        """Companhia(s) aérea(s) da oferta, sem repetição e na ordem dos voos"""
+        carriers = list(dict.fromkeys(seg.marketing_carrier for seg in (offer.segments or ()) if seg.marketing_carrier))
+        return f"✈️ Companhia: {', '.join(carriers)}" if carriers else None
+    
+    @staticmethod
+    def _format_flights(offer) -> Optional[str]:
+        """Números de voo da oferta"""
+        flights = [
+            f"{seg.marketing_carrier}{seg.flight_number}"
+            for seg in (offer.segments or ())
+            if seg.marketing_carrier and seg.flight_number
+        ]
+        return f"🧾 Voos: {', '.join(flights)}" if flights else None
+    
+    @staticmethod
+    def _pax_count(criteria) -> int:
+        """Total de passageiros da busca (mínimo 1, usado no preço por pessoa)"""
+        return max(1, criteria.adults + criteria.children + criteria.infants)
+    
+    @staticmethod
+    def _format_offer_notes(notes: Optional[str]) -> Optional[str]:
+        """Notas da oferta, truncadas exceto quando contêm links"""
+        if not notes:
+            return None
+        # Evita truncar links alternativos
+        if ("http" in notes) or ("Alternativo:" in notes):
+            return notes
+        return notes[:25] + "..." if len(notes) > 25 else notes
     
     def _display_results(self, result, no_ai: bool, open_best: bool = False, open_cheapest: bool = False, open_index: Optional[int] = None):
         """Exibe resultados da busca"""
@@ -188,6 +254,9 @@ Exemplos de uso:
             )
             return
         
+        # Passageiros (pelo menos 1) compartilhados pela tabela e pelo resumo
+        pax_count = self._pax_count(result.search_criteria)
+        
         # Limita resultados exibidos
         limited_offers = result.offers[:20]  # Máximo 20 para não poluir
         
@@ -206,56 +275,38 @@ Exemplos de uso:
         table.add_column("Observações", width=60)
         
         # Adiciona linhas
-        pax_count = max(1, (
-            result.search_criteria.adults
-            + result.search_criteria.children
-            + result.search_criteria.infants
-        ))
-        for offer in limited_offers:
-            per_person = (offer.price_total / pax_count) if pax_count else offer.price_total
+        # Formatação do score definida uma única vez (None quando a coluna está oculta)
+        format_score = None if no_ai else (
+            lambda score: f"{score:.1f}/100" if score else "N/A"
+        )
+        
+        # Projeções por coluna calculadas em uma passada cada (segmentos só são percorridos aqui)
+        carriers_column = [self._format_carriers(offer) for offer in limited_offers]
+        flights_column = [self._format_flights(offer) for offer in limited_offers]
+        
+        for offer, carriers, flights in zip(limited_offers, carriers_column, flights_column):
+            currency = offer.currency
+            price_total = offer.price_total
             row = [
                 offer.provider,
-                f"{offer.currency} {offer.price_total:.2f} | {offer.currency} {per_person:.2f}/pessoa",
+                f"{currency} {price_total:.2f} | {currency} {price_total / pax_count:.2f}/pessoa",
                 offer.route_summary,
                 str(offer.total_stops),
                 offer.cabin_class or "ECONOMY",
             ]
             
-            if not no_ai:
-                score_text = f"{offer.ai_score:.1f}/100" if offer.ai_score else "N/A"
-                row.append(score_text)
+            if format_score is not None:
+                row.append(format_score(offer.ai_score))
             
             # Observações
-            notes = []
-            # Companhia(s) aérea(s)
-            try:
-                carriers = sorted({seg.marketing_carrier for seg in (offer.segments or []) if seg.marketing_carrier})
-                if carriers:
-                    notes.append(f"✈️ Companhia: {', '.join(carriers)}")
-            except Exception:
-                pass
-            # Números de voo
-            try:
-                flights = []
-                for seg in (offer.segments or []):
-                    if seg.marketing_carrier and seg.flight_number:
-                        flights.append(f"{seg.marketing_carrier}{seg.flight_number}")
-                if flights:
-                    notes.append(f"🧾 Voos: {', '.join(flights)}")
-            except Exception:
-                pass
-            if offer.baggage_included:
-                notes.append("✅ Bagagem")
-            if offer.booking_link:
-                notes.append(f"🔗 {offer.booking_link}")
-            if offer.notes:
-                # Evita truncar links alternativos
-                if ("http" in offer.notes) or ("Alternativo:" in offer.notes):
-                    notes.append(offer.notes)
-                else:
-                    notes.append(offer.notes[:25] + "..." if len(offer.notes) > 25 else offer.notes)
-            
-            row.append(" | ".join(notes) if notes else "-")
+            notes_text = " | ".join(filter(None, (
+                carriers,
+                flights,
+                "✅ Bagagem" if offer.baggage_included else None,
+                f"🔗 {offer.booking_link}" if offer.booking_link else None,
+                self._format_offer_notes(offer.notes),
+            )))
+            row.append(notes_text or "-")
             
             table.add_row(*row)
         
@@ -294,13 +345,8 @@ Exemplos de uso:
         
         # Estatísticas
         if result.best_offer and result.cheapest_offer:
-            pax_count_stats = max(1, (
-                result.search_criteria.adults
-                + result.search_criteria.children
-                + result.search_criteria.infants
-            ))
-            best_pp = result.best_offer.price_total / pax_count_stats if pax_count_stats else result.best_offer.price_total
-            cheapest_pp = result.cheapest_offer.price_total / pax_count_stats if pax_count_stats else result.cheapest_offer.price_total
+            best_pp = result.best_offer.price_total / pax_count
+            cheapest_pp = result.cheapest_offer.price_total / pax_count
             stats_text = f"""
 📊 **Estatísticas da Busca:**
 • Total encontrado: {result.total_found} ofertas
@@ -21,6 +21,17 @@ try:
     config = Config()
     print(f"✅ Configuração carregada - Moeda padrão: {config.DEFAULT_CURRENCY}")
     
+    # Testa with_overrides (sem revalidação) contra model_copy(update=...)
+    base_criteria = SearchCriteria(origin="SAO", destination="LIS", depart_dates=["2025-02-15"], adults=2)
+    overrides = {"origin": "GRU", "destination": "OPO", "depart_dates": ["2025-02-16"]}
+    cloned = base_criteria.with_overrides(**overrides)
+    expected = base_criteria.model_copy(update=overrides)
+    for field_name in SearchCriteria.model_fields:
+        assert getattr(cloned, field_name) == getattr(expected, field_name), f"with_overrides difere em {field_name}"
+    assert cloned.max_stops is None and cloned.preferred_currency is None
+    assert base_criteria.origin == "SAO" and base_criteria.depart_dates == ["2025-02-15"]
+    print("✅ with_overrides equivale a model_copy(update=...)")
+    
     print("\n🎉 O projeto FlightTicker está pronto para uso!")
     print("\nPara usar:")
     print("1. Configure suas API keys no arquivo .env")
@@ -29,6 +40,9 @@ try:
 except ImportError as e:
     print(f"❌ Erro de importação: {e}")
     sys.exit(1)
+except AssertionError as e:
+    print(f"❌ Falha na verificação: {e}")
+    sys.exit(1)
 except Exception as e:
     print(f"❌ Erro: {e}")
     sys.exit(1)
\ No newline at end of file